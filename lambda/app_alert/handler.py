@@ -1,18 +1,44 @@
-import json
 import base64
 import os
 from typing import Any
+import orjson
 from urllib.parse import parse_qs
 from slack_sdk import WebClient
 from slack_sdk.signature import SignatureVerifier
 
-from common.observability import build_context, log_info, log_error, emit_metric, Timer
+from common.observability import build_context, log_info, log_error, buffer_metric, flush_metrics, Timer
 from common.notion_client import NotionClient
 from .services.config import load_config
 from .services.actions import parse_action_context, handle_approve_violation, handle_dismiss_violation
 
 SERVICE = "app_alert"
 
+# WebClientのキャッシュ（同一コンテナで再利用）
+_slack_client_cache: dict[str, WebClient] = {}
+
+
+def _get_slack_client(token: str) -> WebClient:
+    client = _slack_client_cache.get(token)
+    if client is None:
+        _slack_client_cache.clear()
+        client = WebClient(token=token)
+        _slack_client_cache[token] = client
+    return client
+
+
+# 署名検証器のキャッシュ（同一コンテナで再利用）
+_verifier_cache: dict[str, SignatureVerifier] = {}
+
+
+def _get_verifier(signing_secret: str) -> SignatureVerifier:
+    verifier = _verifier_cache.get(signing_secret)
+    if verifier is None:
+        _verifier_cache.clear()
+        verifier = SignatureVerifier(signing_secret)
+        _verifier_cache[signing_secret] = verifier
+    return verifier
+
+
 def lambda_handler(event: dict, context: Any) -> dict:
     context = build_context(event, context, service=SERVICE)
     total_timer = Timer()
@@ -22,7 +48,7 @@ def lambda_handler(event: dict, context: Any) -> dict:
         cfg = load_config()
 
         # 1. 署名検証 (Security)
-        verifier = SignatureVerifier(cfg.slack_signing_secret)
+        verifier = _get_verifier(cfg.slack_signing_secret)
         headers = event.get("headers") or {}
         raw_body = event.get("body") or ""
         if event.get("isBase64Encoded"):
@@ -32,9 +58,9 @@ def lambda_handler(event: dict, context: Any) -> dict:
         try:
             if "payload=" in raw_body:
                 decoded = parse_qs(raw_body)
-                payload = json.loads(decoded["payload"][0])
+                payload = orjson.loads(decoded["payload"][0])
             else:
-                payload = json.loads(raw_body)
+                payload = orjson.loads(raw_body)
             log_info(context, action="parse_payload", result="success")
         except Exception as e:
             log_error(context, action="parse_payload", error=e)
@@ -62,7 +88,7 @@ def lambda_handler(event: dict, context: Any) -> dict:
             return {"statusCode": 200, "body": "OK"}
 
         # 3. クライアント初期化
-        slack = WebClient(token=cfg.slack_bot_token)
+        slack = _get_slack_client(cfg.slack_bot_token)
         notion = NotionClient(cfg.notion_api_key, cfg.notion_db_id)
 
         success = False
@@ -91,13 +117,16 @@ def lambda_handler(event: dict, context: Any) -> dict:
             )
 
         if success:
-            emit_metric(context, "ActionSuccess", 1)
+            buffer_metric(context, "ActionSuccess", 1)
             return {"statusCode": 200, "body": "OK"}
         else:
-            emit_metric(context, "ActionFailed", 1)
+            buffer_metric(context, "ActionFailed", 1)
             return {"statusCode": 200, "body": "Action Failed"}
 
     except Exception as e:
         log_error(context, action="handler_failed", error=e)
-        emit_metric(context, "AlertActionError", 1)
+        buffer_metric(context, "AlertActionError", 1)
         return {"statusCode": 200, "body": "error_handled"}
+    finally:
+        # バッファしたメトリクスを1行のEMFにまとめて出力
+        flush_metrics(context)
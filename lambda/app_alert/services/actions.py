@@ -5,6 +5,8 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import Any, TYPE_CHECKING
 
+from common.slack_retry import slack_call_with_retry
+
 if TYPE_CHECKING:
     from slack_sdk import WebClient
     from common.notion_client import NotionClient
@@ -49,8 +51,16 @@ def parse_action_context(payload: dict) -> ActionContext | None:
     )
 
 
+# articles.json のインデックスキャッシュ（同一コンテナで再利用）
+_ARTICLES_INDEX_CACHE: dict[str, dict] | None = None
+
+
 def _load_articles() -> dict[str, dict]:
-    """articles.json から id/article名 → 条文情報 のマップを返す"""
+    """articles.json から id/article名 → 条文情報 のマップを返す（初回だけ読み込む）"""
+    global _ARTICLES_INDEX_CACHE
+    if _ARTICLES_INDEX_CACHE is not None:
+        return _ARTICLES_INDEX_CACHE
+
     path = os.path.join(_ARTICLES_DIR, "articles.json")
     try:
         with open(path, encoding="utf-8") as f:
@@ -59,6 +69,7 @@ def _load_articles() -> dict[str, dict]:
         for a in data.get("articles", []):
             mapping[a.get("id", "")] = a
             mapping[a.get("article", "")] = a
+        _ARTICLES_INDEX_CACHE = mapping
         return mapping
     except Exception:
         return {}
@@ -104,7 +115,8 @@ def handle_approve_violation(
     warning_text = build_warning_text(reply_text, article_id)
 
     try:
-        slack.chat_postMessage(
+        slack_call_with_retry(
+            slack.chat_postMessage,
             channel=origin_channel,
             thread_ts=origin_ts,
             text=warning_text,
@@ -125,7 +137,8 @@ def handle_approve_violation(
                 {"type": "section", "text": {"type": "mrkdwn",
                     "text": f"✅ *対応完了* （警告送信済み）{responder_text}"}}
             ]
-            slack.chat_update(
+            slack_call_with_retry(
+                slack.chat_update,
                 channel=context.admin_channel,
                 ts=context.admin_message_ts,
                 text="Approved",
@@ -162,7 +175,8 @@ def handle_dismiss_violation(
                 {"type": "section", "text": {"type": "mrkdwn",
                     "text": f"🚫 *Dismissed* （対応不要）{responder_text}"}}
             ]
-            slack.chat_update(
+            slack_call_with_retry(
+                slack.chat_update,
                 channel=context.admin_channel,
                 ts=context.admin_message_ts,
                 text="Dismissed",
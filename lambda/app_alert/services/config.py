@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from common.secret_manager import get_secret
+from common.secret_manager import get_secret, prefetch_secrets
 
 @dataclass(frozen=True)
 class AlertConfig:
@@ -13,10 +13,34 @@ class AlertConfig:
     notion_db_id: str
     reply_prefix: str
 
+# 設定のキャッシュ（同一コンテナで再利用）
+# get_secret のSSM往復は各10-50msかかるが、値はコンテナ寿命の間変わらない
+_CONFIG: AlertConfig | None = None
+
+
 def load_config() -> AlertConfig:
+    global _CONFIG
+    if _CONFIG is not None:
+        return _CONFIG
+    cfg = _build_config()
+    # シークレット取得に失敗した（空の）設定をキャッシュすると、SSM復旧後も
+    # コンテナ寿命の間ずっと署名検証に失敗し続ける。次回の呼び出しで再試行させる
+    if cfg.slack_bot_token and cfg.slack_signing_secret and cfg.notion_api_key:
+        _CONFIG = cfg
+    return cfg
+
+
+def _build_config() -> AlertConfig:
     def _get_env(name: str, default: str = "") -> str:
         return os.getenv(name, default)
     
+    # 3つのシークレットをSSM 1往復でまとめて取得しておく
+    prefetch_secrets([
+        "SLACK_BOT_TOKEN_PARAM_NAME",
+        "SLACK_SIGNING_SECRET_PARAM_NAME",
+        "NOTION_API_KEY_PARAM_NAME",
+    ])
+
     return AlertConfig(
         slack_bot_token=get_secret("SLACK_BOT_TOKEN_PARAM_NAME"),
         slack_signing_secret=get_secret("SLACK_SIGNING_SECRET_PARAM_NAME"),
@@ -1,5 +1,5 @@
 """Slackメッセージ・ボタン構築ユーティリティ"""
-import json
+import orjson
 
 
 def encode_alert_button_value(notion_page_id: str | None, **kwargs) -> str:
@@ -15,4 +15,5 @@ def encode_alert_button_value(notion_page_id: str | None, **kwargs) -> str:
     data = kwargs
     if notion_page_id:
         data["notion_page_id"] = notion_page_id
-    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    # orjsonは常にUTF-8・コンパクト区切りで出力する（従来のensure_ascii=False相当）
+    return orjson.dumps(data).decode()
@@ -1,13 +1,14 @@
-import json
 import base64
+import hashlib
+import time
 from typing import Any
+import orjson
 from slack_sdk import WebClient
 from slack_sdk.signature import SignatureVerifier
-from openai import OpenAI
 
 # commonモジュールのインポート
-from common.observability import build_context, log_info, log_error, emit_metric, Timer
-from common.notion_client import NotionClient
+from common.observability import build_context, log_info, log_error, buffer_metric, flush_metrics, Timer
+from common.slack_retry import slack_call_with_retry
 from .services.config import load_config
 from .services.moderation import run_moderation
 from .components.slack_builder import encode_alert_button_value
@@ -15,6 +16,159 @@ from .services.models import severity_rank, ModerationResult
 
 SERVICE = "app_inspect"
 
+# 遅延インポート（コールドスタート削減）
+# openai のimportは数百msかかるがモック時は不要、NotionClientは違反検知時のみ必要。
+# モジュール属性として持つことでテストからのmonkeypatchは従来どおり効く
+OpenAI = None
+NotionClient = None
+
+
+def _openai_cls():
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as _cls
+        OpenAI = _cls
+    return OpenAI
+
+
+def _notion_client_cls():
+    global NotionClient
+    if NotionClient is None:
+        from common.notion_client import NotionClient as _cls
+        NotionClient = _cls
+    return NotionClient
+
+
+# アラートの静的なボタン骨格（毎回dictを組み立て直さない。valueだけ呼び出し時に差す）
+_ALERT_ACTION_BUTTONS = (
+    {
+        "type": "button",
+        "text": {"type": "plain_text", "text": "削除勧告を送る"},
+        "style": "danger",
+        "action_id": "approve_violation",
+    },
+    {
+        "type": "button",
+        "text": {"type": "plain_text", "text": "Dismiss（対応不要）"},
+        "action_id": "dismiss_violation",
+    },
+)
+
+
+# WebClientのキャッシュ（同一コンテナで再利用）
+# urllib3のコネクションプールごと使い回し、warm invocationのTLSハンドシェイクを省く
+_slack_client_cache: dict[str, WebClient] = {}
+
+
+def _get_slack_client(token: str) -> WebClient:
+    client = _slack_client_cache.get(token)
+    if client is None:
+        _slack_client_cache.clear()
+        client = WebClient(token=token)
+        _slack_client_cache[token] = client
+    return client
+
+
+# 署名検証器のキャッシュ（同一コンテナで再利用）
+# HMAC鍵のセットアップを毎回やり直さない。secretはローテーションしうるのでキーに含める
+_verifier_cache: dict[str, SignatureVerifier] = {}
+
+
+def _get_verifier(signing_secret: str) -> SignatureVerifier:
+    verifier = _verifier_cache.get(signing_secret)
+    if verifier is None:
+        _verifier_cache.clear()
+        verifier = SignatureVerifier(signing_secret)
+        _verifier_cache[signing_secret] = verifier
+    return verifier
+
+
+def _hget(headers: dict, key: str):
+    """ヘッダを大文字小文字無視で1キーだけ引く（全ヘッダの小文字化dictを作らない）"""
+    key = key.lower()
+    return next((v for k, v in headers.items() if k.lower() == key), None)
+
+# Slack名前解決のキャッシュ（同一コンテナで再利用）
+# ユーザー名/チャンネル名/ワークスペース名はコンテナ寿命の間ほぼ静的なので、
+# 2回目以降のSlack API往復（各100-300ms）を省略する。
+# 表示名だけはユーザーが変更しうるため10分のTTLを付ける
+_user_name_cache: dict[str, tuple[str, float]] = {}
+_channel_name_cache: dict[str, str] = {}
+_team_name_cache: dict[str, str] = {}
+_USER_NAME_TTL_SEC = 600.0
+
+
+def _resolve_user_name(client: WebClient, user_id: str) -> str:
+    entry = _user_name_cache.get(user_id)
+    if entry is not None:
+        name, expires_at = entry
+        if expires_at > time.time():
+            return name
+        del _user_name_cache[user_id]
+    u_res = client.users_info(user=user_id)
+    p = u_res["user"]["profile"]
+    name = "@" + (p.get("display_name") or p.get("real_name") or user_id)
+    _user_name_cache[user_id] = (name, time.time() + _USER_NAME_TTL_SEC)
+    return name
+
+
+def _resolve_channel_name(client: WebClient, channel_id: str) -> str:
+    name = _channel_name_cache.get(channel_id)
+    if name is None:
+        c_res = client.conversations_info(channel=channel_id)
+        name = c_res["channel"]["name"]
+        _channel_name_cache[channel_id] = name
+    return name
+
+
+def _resolve_team_name(client: WebClient, team_id: str) -> str:
+    name = _team_name_cache.get(team_id)
+    if name is None:
+        t_res = client.team_info(team=team_id)
+        name = t_res["team"]["name"]
+        _team_name_cache[team_id] = name
+    return name
+
+
+# モデレーション結果のTTLキャッシュ（同一コンテナで再利用）
+# Slackには再投稿・コピペ等の重複が多く、同一内容にOpenAIを呼び直すのは無駄。
+# キーは model + ガイドライン + 本文 のハッシュ（blake2bは短い入力に対して高速）
+_MOD_CACHE: dict[str, tuple[float, ModerationResult]] = {}
+_MOD_CACHE_TTL_SEC = 600.0
+_MOD_CACHE_MAXSIZE = 2048
+
+
+def _moderation_cache_key(model: str, guidelines: str, text: str) -> str:
+    raw = f"{model}|{guidelines}|{text}".encode("utf-8")
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def _moderation_cache_get(key: str) -> ModerationResult | None:
+    entry = _MOD_CACHE.get(key)
+    if entry is None:
+        return None
+    expires_at, result = entry
+    if expires_at < time.time():
+        del _MOD_CACHE[key]
+        return None
+    return result
+
+
+def _moderation_cache_put(key: str, result: ModerationResult) -> None:
+    if len(_MOD_CACHE) >= _MOD_CACHE_MAXSIZE:
+        _MOD_CACHE.clear()
+    _MOD_CACHE[key] = (time.time() + _MOD_CACHE_TTL_SEC, result)
+
+
+def _is_error_result(result: ModerationResult) -> bool:
+    """run_moderationのfail-openフォールバック（またはLLM判定エラー）かどうか
+
+    エラー結果をキャッシュすると、一時的なAPI障害中に見た投稿が復旧後も
+    TTLの間ずっと白判定のままになるため、キャッシュ書き込み前に弾く
+    """
+    rationale = result.rationale or ""
+    return rationale.startswith("Error:") or "LLM判定エラー" in rationale
+
 def lambda_handler(event: dict, context: Any) -> dict:
     # 1. コンテキスト初期化（この時点でSlackのIDなどが自動抽出される）
     context = build_context(event, context, service=SERVICE)
@@ -24,21 +178,24 @@ def lambda_handler(event: dict, context: Any) -> dict:
     try:
         # 1.5 Slackリトライ検出（3秒タイムアウト時の再送を即返却）
         raw_headers = event.get("headers") or {}
-        lower_headers = {k.lower(): v for k, v in raw_headers.items()}
-        if lower_headers.get("x-slack-retry-num"):
-            log_info(context, action="retry_skip", retry_num=lower_headers["x-slack-retry-num"])
+        retry_num = _hget(raw_headers, "x-slack-retry-num")
+        if retry_num:
+            log_info(context, action="retry_skip", retry_num=retry_num)
             return {"statusCode": 200, "body": "ok"}
 
         # 設定のロード
         cfg = load_config()
 
         # 2. ボディのパース
+        # base64の場合はbytesのまま扱う（orjson/SignatureVerifierは両方bytes対応なので
+        # .decode("utf-8") の往復コピーは不要）
         body = event.get("body") or ""
         if event.get("isBase64Encoded"):
-            body = base64.b64decode(body).decode("utf-8")
+            body = base64.b64decode(body)
 
         try:
-            body_json = json.loads(body)
+            # orjson は str/bytes の両方を直接パースできる（stdlib jsonより高速）
+            body_json = orjson.loads(body)
         except Exception as e:
             # log_error の第3引数は例外オブジェクトそのものを渡す
             log_error(context, action="parse_json", error=e)
@@ -50,11 +207,11 @@ def lambda_handler(event: dict, context: Any) -> dict:
             return {
                 "statusCode": 200,
                 "headers": {"Content-Type": "application/json"},
-                "body": json.dumps({"challenge": body_json.get("challenge", "")})
+                "body": orjson.dumps({"challenge": body_json.get("challenge", "")}).decode()
             }
 
         # 4. 署名検証
-        verifier = SignatureVerifier(cfg.slack_signing_secret)
+        verifier = _get_verifier(cfg.slack_signing_secret)
         headers = event.get("headers") or {}
         if not verifier.is_valid_request(body, headers):
             # 検証失敗は警告として記録
@@ -75,6 +232,7 @@ def lambda_handler(event: dict, context: Any) -> dict:
         log_info(context, action="start_moderation", text_length=len(text))
         inference_timer = Timer()
         
+        cache_hit = False
         if cfg.use_mock_openai:
             is_mock_violation = "違反" in text
             result = ModerationResult(
@@ -87,19 +245,27 @@ def lambda_handler(event: dict, context: Any) -> dict:
                 article_id="mock_article_123"
             )
         else:
-            openai_client = OpenAI(api_key=cfg.openai_api_key)
-            result = run_moderation(openai_client, cfg.openai_model, cfg.guidelines_text, text)
-        
-        emit_metric(context, "InferenceLatencyMs", inference_timer.ms(), unit="Milliseconds")
+            cache_key = _moderation_cache_key(cfg.openai_model, cfg.guidelines_text, text)
+            cached = _moderation_cache_get(cache_key)
+            if cached is not None:
+                cache_hit = True
+                result = cached
+            else:
+                openai_client = _openai_cls()(api_key=cfg.openai_api_key)
+                result = run_moderation(openai_client, cfg.openai_model, cfg.guidelines_text, text)
+                if not _is_error_result(result):
+                    _moderation_cache_put(cache_key, result)
+
+        buffer_metric(context, "InferenceLatencyMs", inference_timer.ms(), unit="Milliseconds")
 
         if not result.is_violation or severity_rank(result.severity) < severity_rank(cfg.min_severity_to_alert):
-            log_info(context, action="judge", result="not_violation")
+            log_info(context, action="judge", result="not_violation", cache_hit=cache_hit)
             return {"statusCode": 200, "body": "ok"}
 
         # 7. 外部連携
         try:
-            notion = NotionClient(cfg.notion_api_key, cfg.notion_db_id)
-            slack_client = WebClient(token=cfg.slack_bot_token)
+            notion = _notion_client_cls()(cfg.notion_api_key, cfg.notion_db_id)
+            slack_client = _get_slack_client(cfg.slack_bot_token)
 
             # Slack APIで名前を解決する 
             raw_user_id = ev.get("user", "")
@@ -112,23 +278,19 @@ def lambda_handler(event: dict, context: Any) -> dict:
             workspace_name = raw_team_id
 
             try:
-                # ユーザーの表示名を取得
+                # ユーザーの表示名を取得（キャッシュ付き）
                 if raw_user_id:
-                    u_res = slack_client.users_info(user=raw_user_id)
-                    p = u_res["user"]["profile"]
-                    profile_name = "@" + (p.get("display_name") or p.get("real_name") or raw_user_id)
-                
-                # チャンネル名を取得
+                    profile_name = _resolve_user_name(slack_client, raw_user_id)
+
+                # チャンネル名を取得（キャッシュ付き）
                 if raw_channel_id:
-                    c_res = slack_client.conversations_info(channel=raw_channel_id)
-                    channel_name = c_res["channel"]["name"]
-                
-                # ワークスペース名を取得
+                    channel_name = _resolve_channel_name(slack_client, raw_channel_id)
+
+                # ワークスペース名を取得（キャッシュ付き）
                 if raw_team_id:
-                    t_res = slack_client.team_info(team=raw_team_id)
-                    workspace_name = t_res["team"]["name"]
+                    workspace_name = _resolve_team_name(slack_client, raw_team_id)
             except Exception as e:
-                log_error(ctx, action="fetch_slack_names", error=e)
+                log_error(context, action="fetch_slack_names", error=e)
 
             # 重複チェック（同じ投稿の二重処理防止）
             if notion.check_duplicate_violation(ev["ts"]):
@@ -170,6 +332,9 @@ def lambda_handler(event: dict, context: Any) -> dict:
         )
         origin_channel = ev["channel"]
 
+        # プレビューは一度だけ切り出し、mrkdwnを壊す文字をエスケープして使い回す
+        text_preview = text[:200].replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
         blocks = [
             {
                 "type": "section",
@@ -179,40 +344,34 @@ def lambda_handler(event: dict, context: Any) -> dict:
                         "🚨 *違反の可能性を検知*\n"
                         f"*チャンネル*: <#{origin_channel}>\n"
                         f"*投稿*: <{post_link}|元投稿を開く>\n"
-                        f"*内容*: {text[:200]}\n"
+                        f"*内容*: {text_preview}\n"
                         f"*理由*: {result.rationale}"
                     ),
                 },
             },
             {
                 "type": "actions",
-                "elements": [
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "削除勧告を送る"},
-                        "style": "danger",
-                        "action_id": "approve_violation",
-                        "value": button_value,
-                    },
-                    {
-                        "type": "button",
-                        "text": {"type": "plain_text", "text": "Dismiss（対応不要）"},
-                        "action_id": "dismiss_violation",
-                        "value": button_value,
-                    },
-                ],
+                "elements": [{**b, "value": button_value} for b in _ALERT_ACTION_BUTTONS],
             },
         ]
 
-        slack_client.chat_postMessage(channel=cfg.alert_private_channel_id, text="【違反検知アラート】", blocks=blocks)
+        slack_call_with_retry(
+            slack_client.chat_postMessage,
+            channel=cfg.alert_private_channel_id,
+            text="【違反検知アラート】",
+            blocks=blocks,
+        )
 
         log_info(context, action="alert_sent", result="success", page_id=notion_page_id)
-        emit_metric(context, "TotalLatencyMs", total_timer.ms(), unit="Milliseconds")
+        buffer_metric(context, "TotalLatencyMs", total_timer.ms(), unit="Milliseconds")
 
         return {"statusCode": 200, "body": "ok"}
 
     except Exception as e:
         # e (例外オブジェクト) をそのまま渡すことで log_error の仕様に合わせる
         log_error(context, action="handler_process", error=e)
-        emit_metric(context, "handler_error", 1)
-        return {"statusCode": 200, "body": "error_handled"}
\ No newline at end of file
+        buffer_metric(context, "handler_error", 1)
+        return {"statusCode": 200, "body": "error_handled"}
+    finally:
+        # バッファしたメトリクスを1行のEMFにまとめて出力
+        flush_metrics(context)
\ No newline at end of file
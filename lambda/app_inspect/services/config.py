@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from common.secret_manager import get_secret
+from common.secret_manager import get_secret, prefetch_secrets
 
 @dataclass(frozen=True)
 class InspectConfig:
@@ -19,7 +19,29 @@ class InspectConfig:
 
     use_mock_openai: bool
 
+# 設定のキャッシュ（同一コンテナで再利用）
+# get_secret のSSM往復は各10-50msかかるが、値はコンテナ寿命の間変わらない
+_CONFIG: InspectConfig | None = None
+
+
 def load_config() -> InspectConfig:
+    global _CONFIG
+    if _CONFIG is not None:
+        return _CONFIG
+    cfg = _build_config()
+    # シークレット取得に失敗した（空の）設定をキャッシュすると、SSM復旧後も
+    # コンテナ寿命の間ずっと署名検証に失敗し続ける。次回の呼び出しで再試行させる
+    if (
+        cfg.slack_bot_token
+        and cfg.slack_signing_secret
+        and cfg.openai_api_key
+        and cfg.notion_api_key
+    ):
+        _CONFIG = cfg
+    return cfg
+
+
+def _build_config() -> InspectConfig:
     guidelines_text = os.getenv("GUIDELINES_TEXT", "").strip()
     if not guidelines_text:
         guidelines_text = (
@@ -37,6 +59,14 @@ def load_config() -> InspectConfig:
             raise RuntimeError(f"Missing env var: {name}")
         return v
 
+    # 4つのシークレットをSSM 1往復でまとめて取得しておく
+    prefetch_secrets([
+        "SLACK_BOT_TOKEN_PARAM_NAME",
+        "SLACK_SIGNING_SECRET_PARAM_NAME",
+        "OPENAI_API_KEY_PARAM_NAME",
+        "NOTION_API_KEY_PARAM_NAME",
+    ])
+
     return InspectConfig(
         slack_bot_token=get_secret("SLACK_BOT_TOKEN_PARAM_NAME"),
         slack_signing_secret=get_secret("SLACK_SIGNING_SECRET_PARAM_NAME"),
@@ -1,8 +1,13 @@
 from dataclasses import dataclass
+from itertools import islice
 from typing import Literal
 
 Severity = Literal["low", "medium", "high"]
 
+# 3段階検出器は recommended_reply="" を渡してくるのが通常経路なので、
+# デフォルト文言はモジュール定数にして毎回の文字列生成を避ける
+_DEFAULT_REPLY = "この投稿はガイドラインに抵触する可能性があります。内容をご確認の上、削除または修正をお願いします。"
+
 @dataclass(frozen=True)
 class ModerationResult:
     is_violation: bool
@@ -23,11 +28,11 @@ def normalize_result(raw: dict) -> ModerationResult:
     categories = raw.get("categories") or []
     if not isinstance(categories, list):
         categories = [str(categories)]
-    categories = [str(x) for x in categories][:8]
+    # 最初の8件だけstr化する（全件変換してからスライスしない＝巨大入力でも作業量が一定）
+    categories = [str(x) for x in islice(categories, 8)]
     rationale = str(raw.get("rationale", ""))[:800]
-    recommended_reply = str(raw.get("recommended_reply", "")).strip()[:600]
-    if not recommended_reply:
-        recommended_reply = "この投稿はガイドラインに抵触する可能性があります。内容をご確認の上、削除または修正をお願いします。"
+    rr = raw.get("recommended_reply")
+    recommended_reply = _DEFAULT_REPLY if not rr else (str(rr).strip()[:600] or _DEFAULT_REPLY)
     return ModerationResult(
         is_violation=is_violation,
         severity=severity,  # type: ignore
@@ -38,5 +43,8 @@ def normalize_result(raw: dict) -> ModerationResult:
         article_id=raw.get("article_id"),
     )
 
+_SEV_RANK: dict[str, int] = {"low": 0, "medium": 1, "high": 2}
+
+
 def severity_rank(sev: Severity) -> int:
-    return {"low": 0, "medium": 1, "high": 2}[sev]
+    return _SEV_RANK[sev]
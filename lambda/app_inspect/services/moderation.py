@@ -2,6 +2,21 @@ from openai import OpenAI
 from .models import ModerationResult, normalize_result
 from .violation_detector import ViolationDetector
 
+# ViolationDetector のシングルトン（同一コンテナで再利用）
+# 毎回作り直すと条文インデックスの再構築に加え、せっかく貯めた
+# embeddingキャッシュ・検出結果キャッシュが捨てられてしまう
+_DETECTOR: ViolationDetector | None = None
+
+
+def _get_detector(client: OpenAI) -> ViolationDetector:
+    global _DETECTOR
+    if _DETECTOR is None:
+        _DETECTOR = ViolationDetector(openai_client=client)
+    else:
+        # クライアントは呼び出しごとに差し替える（設定変更に追従）
+        _DETECTOR.client = client
+    return _DETECTOR
+
 
 def _confidence_to_severity(confidence: float) -> str:
     """確信度をseverityレベルに変換"""
@@ -15,7 +30,7 @@ def _confidence_to_severity(confidence: float) -> str:
 def run_moderation(client: OpenAI, model: str, guidelines: str, message_text: str) -> ModerationResult:
     """3段階違反検出: NGワード → RAG → LLM"""
     try:
-        detector = ViolationDetector(openai_client=client)
+        detector = _get_detector(client)
         result = detector.detect(message_text)
 
         return normalize_result({
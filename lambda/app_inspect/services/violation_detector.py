@@ -1,14 +1,26 @@
 """3段階違反検出モジュール: NGワード → RAG → LLM"""
+import hashlib
 import json
 import re
 import math
 import os
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
+import orjson
+
 _DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 _COMMON_DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "common", "data")
 
+# 追加: 事前計算済み条文embeddingの置き場所
+# デプロイ時に同梱すればコールドスタートのembedding API一斉呼び出しを丸ごと省ける。
+# 同梱が無くても、初回計算分を/tmpに退避して同一実行環境内の再initで再利用する
+_EMBEDDINGS_BUNDLE_PATH = os.path.join(_COMMON_DATA_DIR, "articles_embeddings.json")
+_EMBEDDINGS_TMP_PATH = "/tmp/articles_embeddings.json"
+
 # 追加: Prompt/Schema の置き場所（data配下で統一）
 _PROMPTS_DIR = os.path.join(_DATA_DIR, "prompts")
 _JUDGE_PROMPT_PATH = os.path.join(_PROMPTS_DIR, "judge_violation.njk")
@@ -18,25 +30,41 @@ _RESPONSE_FORMAT_PATH = os.path.join(_PROMPTS_DIR, "judge_violation.response_for
 _PROMPT_TEMPLATE_CACHE: Optional[str] = None
 _RESPONSE_FORMAT_CACHE: Optional[dict] = None
 
-_DEFAULT_JUDGE_PROMPT = """あなたはSlack投稿のガイドライン違反を判定するアシスタントです。
+# 追加: LLM判定レスポンスのキャッシュ（temperature=0 なので同一プロンプト→同一出力。
+# contentの文字列だけを保持し、同一コンテナ内の重複投稿でAPI往復を省く）
+_LLM_JUDGE_CACHE: dict = {}
+_LLM_JUDGE_CACHE_MAX = 512
 
-## 関連する規約条文
-{{articles_text}}
+# 追加: detect() 全体のTTL付きLRUキャッシュ設定（スパム連投時に3段パイプラインを丸ごと省略）
+_DETECT_CACHE_TTL_SEC = 300.0
+_DETECT_CACHE_MAXSIZE = 1024
 
-## 投稿内容
-{{text}}
+# 追加: RAGの最大類似度がこの値未満なら関連条文なしとみなし、LLM判定を省略する
+_RAG_SIMILARITY_FLOOR = float(os.getenv("RAG_SIMILARITY_FLOOR", "0.25"))
+
+# 変動する {{text}} を末尾に置き、安定したプレフィクス（指示+条文）を先頭に
+# まとめることで、OpenAIのプロンプトプレフィクスキャッシュが効くようにしている
+_DEFAULT_JUDGE_PROMPT = """あなたはSlack投稿のガイドライン違反を判定するアシスタントです。
 
 ## タスク
-この投稿が上記の規約条文に違反しているか判定してください。
+最後に与えられる投稿内容が、以下の規約条文に違反しているか判定してください。
 
 ## 出力形式（JSON）
 {"is_violation": true/false, "confidence": 0.0-1.0, "article_id": "該当条文のID", "category": "違反カテゴリ", "reason": "判定理由"}
 
 JSONのみを出力してください。
+
+## 関連する規約条文
+{{articles_text}}
+
+## 投稿内容
+{{text}}
 """
 
 
+@lru_cache(maxsize=None)
 def _load_json_list(path: str, key: str) -> list:
+    """静的な参照データ（articles/ng_patterns）は初回だけ読み込んで使い回す"""
     if not path or not os.path.exists(path):
         return []
     with open(path, encoding="utf-8") as f:
@@ -75,12 +103,17 @@ def _get_response_format() -> dict:
     return _RESPONSE_FORMAT_CACHE
 
 
+# {{ var }} 置換用（モジュールロード時に1回だけコンパイル）
+_TEMPLATE_VAR_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+_TEXT_VAR_RE = re.compile(r"\{\{\s*text\s*\}\}")
+
+
 def _render_template(template: str, **vars: str) -> str:
-    """{{ var }} を最小実装で置換（依存追加なし）"""
-    out = template
-    for k, v in vars.items():
-        out = re.sub(r"{{\s*" + re.escape(k) + r"\s*}}", str(v), out)
-    return out
+    """{{ var }} を最小実装で置換（依存追加なし・テンプレート1パス）"""
+    return _TEMPLATE_VAR_RE.sub(
+        lambda m: str(vars[m.group(1)]) if m.group(1) in vars else m.group(0),
+        template,
+    )
 
 
 @dataclass
@@ -110,9 +143,66 @@ class ViolationDetector:
         self._article_title_by_id = {a["id"]: a.get("article", a["id"]) for a in self.articles}
         self._article_id_by_title = {a.get("article"): a["id"] for a in self.articles if a.get("article")}
 
-        self._embedding_cache = {}
+        # 追加: NGパターンはロード時に一度だけコンパイルする
+        # （不正なパターンは毎メッセージではなくここで除外する）
+        self._compiled_ng = []
+        for p in self.ng_patterns:
+            try:
+                compiled = re.compile(p["pattern"], re.IGNORECASE)
+            except re.error:
+                continue
+            self._compiled_ng.append(
+                (compiled, p["pattern"], p["article_id"], p["category"], set(p.get("courses", ["ALL"])))
+            )
+
+        # 追加: 全パターンを1本のalternationに融合（名前付きグループで発火ルールを特定）
+        # N本のregexでN回textを走査する代わりに、1回の走査で済ませる
+        self._ng_union = None
+        if self._compiled_ng:
+            try:
+                self._ng_union = re.compile(
+                    "|".join(
+                        f"(?P<r{i}>{pattern})"
+                        for i, (_, pattern, _, _, _) in enumerate(self._compiled_ng)
+                    ),
+                    re.IGNORECASE,
+                )
+            except re.error:
+                self._ng_union = None
+
+        self._embedding_cache = self._load_precomputed_embeddings()
+        # 条文ベクトルのノルムは不変なので一度だけ計算してキャッシュする
+        self._embedding_norms: dict = {}
+
+        # detect() 結果のTTL付きLRU（キー: course|skip_llm|text のハッシュ）
+        self._detect_cache: OrderedDict = OrderedDict()
+
+        # top-k条文ID組み合わせ → レンダリング済みプロンプトprefix のキャッシュ
+        # （本文以外は毎回同じなので、リクエスト時は文字列連結だけで済ませる）
+        self._prompt_prefix_cache: dict = {}
 
     def detect(self, text: str, course: str = None, skip_llm: bool = False) -> DetectionResult:
+        cache_key = hashlib.blake2b(
+            f"{course}|{skip_llm}|{text}".encode("utf-8"), digest_size=16
+        ).hexdigest()
+        cached = self._detect_cache.get(cache_key)
+        if cached is not None:
+            result, expires_at = cached
+            if expires_at > time.time():
+                self._detect_cache.move_to_end(cache_key)
+                return result
+            del self._detect_cache[cache_key]
+
+        result = self._detect_uncached(text, course, skip_llm)
+
+        # エラー経路の結果はキャッシュしない（次回リトライさせる）
+        if "LLM判定エラー" not in result.reason:
+            while len(self._detect_cache) >= _DETECT_CACHE_MAXSIZE:
+                self._detect_cache.popitem(last=False)
+            self._detect_cache[cache_key] = (result, time.time() + _DETECT_CACHE_TTL_SEC)
+        return result
+
+    def _detect_uncached(self, text: str, course: str = None, skip_llm: bool = False) -> DetectionResult:
         # Step 1: NGワード
         ng_match = self._check_ng_patterns(text, course)
         if ng_match:
@@ -146,6 +236,20 @@ class ViolationDetector:
         # Step 2: RAG（関連条文を検索）
         relevant = self._find_relevant_articles(text, course, top_k=3)
 
+        # 最大類似度が閾値未満なら該当条文なしと判断し、LLM呼び出しを省略する
+        # （通常の雑談はここで止まるため、レイテンシ/トークンコストの最大の削減点）
+        top_similarity = relevant[0]["similarity"] if relevant else 0.0
+        if top_similarity < _RAG_SIMILARITY_FLOOR:
+            return DetectionResult(
+                is_violation=False,
+                confidence=top_similarity,
+                method="RAG",
+                article_id=None,
+                category=None,
+                reason="関連する条文なし（類似度が閾値未満）",
+                step_stopped=2,
+            )
+
         # Step 3: LLM（条文付きで判定）
         result = self._judge_by_llm(text, relevant)
 
@@ -182,20 +286,51 @@ class ViolationDetector:
         return s
 
     def _check_ng_patterns(self, text: str, course: str = None) -> Optional[dict]:
-        for p in self.ng_patterns:
-            courses = p.get("courses", ["ALL"])
+        # course指定なし（通常経路）は融合regexの1パス走査で判定する。
+        # courseフィルタがある場合は、除外ルールの先行マッチで後続の
+        # 有効ルールを取りこぼさないよう個別パターンで走査する
+        if course is None and self._ng_union is not None:
+            m = self._ng_union.search(text)
+            if m is None:
+                return None
+            _, pattern, article_id, category, _ = self._compiled_ng[int(m.lastgroup[1:])]
+            return {
+                "pattern": pattern,
+                "article_id": article_id,
+                "category": category,
+            }
+
+        for compiled, pattern, article_id, category, courses in self._compiled_ng:
             if course and "ALL" not in courses and course not in courses:
                 continue
+            if compiled.search(text):
+                return {
+                    "pattern": pattern,
+                    "article_id": article_id,
+                    "category": category,
+                }
+        return None
+
+    def _load_precomputed_embeddings(self) -> dict:
+        """事前計算済みの条文embedding（デプロイ同梱 or /tmp退避分）があれば読み込む"""
+        for path in (_EMBEDDINGS_BUNDLE_PATH, _EMBEDDINGS_TMP_PATH):
             try:
-                if re.search(p["pattern"], text, re.IGNORECASE):
-                    return {
-                        "pattern": p["pattern"],
-                        "article_id": p["article_id"],
-                        "category": p["category"],
-                    }
-            except re.error:
+                if os.path.exists(path):
+                    with open(path, "rb") as f:
+                        return orjson.loads(f.read())
+            except Exception:
                 pass
-        return None
+        return {}
+
+    def _persist_embeddings(self) -> None:
+        """条文embeddingを/tmpへ退避する（同一実行環境での再initのAPI再計算を省く）"""
+        try:
+            tmp_path = _EMBEDDINGS_TMP_PATH + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(self._embedding_cache))
+            os.replace(tmp_path, _EMBEDDINGS_TMP_PATH)
+        except Exception:
+            pass
 
     def _find_relevant_articles(self, text: str, course: str = None, top_k: int = 3) -> list:
         articles = self.articles
@@ -205,14 +340,35 @@ class ViolationDetector:
                 if "ALL" in a.get("courses", ["ALL"]) or course in a.get("courses", [])
             ]
 
-        text_vec = self._get_embedding(text)
+        # 未キャッシュの条文とクエリ本文を1回のembeddings呼び出しにまとめる
+        # （初回はN+1回の逐次HTTP往復だったものが1往復になる）
+        missing = [
+            (a["id"], f"{a['content']} {' '.join(a.get('keywords', []))}")
+            for a in articles
+            if a["id"] not in self._embedding_cache
+        ]
+        resp = self.client.embeddings.create(
+            model="text-embedding-3-small",
+            input=[content for _, content in missing] + [text],
+        )
+        for (aid, _), item in zip(missing, resp.data):
+            self._embedding_cache[aid] = item.embedding
+        if missing:
+            self._persist_embeddings()
+        text_vec = resp.data[-1].embedding
+
+        # クエリ側のノルムは1回だけ、条文側はキャッシュ済みノルムを使う
+        q_norm = math.sqrt(sum(x * x for x in text_vec))
         scored = []
         for a in articles:
-            content = f"{a['content']} {' '.join(a.get('keywords', []))}"
             aid = a["id"]
-            if aid not in self._embedding_cache:
-                self._embedding_cache[aid] = self._get_embedding(content)
-            sim = self._cosine_sim(text_vec, self._embedding_cache[aid])
+            vec = self._embedding_cache[aid]
+            norm = self._embedding_norms.get(aid)
+            if norm is None:
+                norm = math.sqrt(sum(x * x for x in vec))
+                self._embedding_norms[aid] = norm
+            dot = sum(x * y for x, y in zip(text_vec, vec))
+            sim = dot / (q_norm * norm) if q_norm and norm else 0.0
             scored.append((a, sim))
 
         scored.sort(key=lambda x: x[1], reverse=True)
@@ -229,22 +385,52 @@ class ViolationDetector:
 
     def _judge_by_llm(self, text: str, articles: list) -> dict:
         # 重要: IDを含めて渡す（LLMがarticle_idを返せるようにする）
-        articles_text = "\n".join(
-            [f"- {a['id']} {a.get('article','')}: {a.get('content','')}" for a in articles]
-        )
-
-        template = _get_prompt_template()
-        prompt = _render_template(template, text=text, articles_text=articles_text)
+        # id順に並べることで同じtop-k集合ならプレフィクスが常に同一になり、
+        # サーバー側のプレフィクスキャッシュにヒットする。
+        # レンダリング済みprefixはtop-k ID組でキャッシュし、regex置換を省く
+        ids_key = tuple(sorted(a["id"] for a in articles))
+        rendered = self._prompt_prefix_cache.get(ids_key)
+        if rendered is None:
+            articles_text = "\n".join(
+                f"- {a['id']} {a.get('article','')}: {a.get('content','')}"
+                for a in sorted(articles, key=lambda a: a["id"])
+            )
+            template = _get_prompt_template()
+            m = _TEXT_VAR_RE.search(template)
+            if m:
+                prefix = _render_template(template[: m.start()], articles_text=articles_text)
+                suffix = template[m.end():]
+            else:
+                prefix = _render_template(template, articles_text=articles_text)
+                suffix = ""
+            prompt_cache_key = hashlib.blake2b(
+                prefix.encode("utf-8"), digest_size=8
+            ).hexdigest()
+            rendered = (prefix, suffix, prompt_cache_key)
+            self._prompt_prefix_cache[ids_key] = rendered
+
+        prefix, suffix, prompt_cache_key = rendered
+        prompt = prefix + text + suffix
+
+        cache_key = hashlib.blake2b(
+            f"gpt-4o-mini|{prompt}".encode("utf-8"), digest_size=16
+        ).hexdigest()
 
         try:
-            resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                response_format=_get_response_format(),
-                temperature=0,
-            )
-            content = (resp.choices[0].message.content or "").strip()
-            r = json.loads(content) if content else {}
+            content = _LLM_JUDGE_CACHE.get(cache_key)
+            if content is None:
+                resp = self.client.chat.completions.create(
+                    model="gpt-4o-mini",
+                    messages=[{"role": "user", "content": prompt}],
+                    response_format=_get_response_format(),
+                    temperature=0,
+                    extra_body={"prompt_cache_key": prompt_cache_key},
+                )
+                content = (resp.choices[0].message.content or "").strip()
+                if len(_LLM_JUDGE_CACHE) >= _LLM_JUDGE_CACHE_MAX:
+                    _LLM_JUDGE_CACHE.clear()
+                _LLM_JUDGE_CACHE[cache_key] = content
+            r = orjson.loads(content) if content else {}
             return {
                 "is_violation": r.get("is_violation", False),
                 "confidence": r.get("confidence", 0.5),
@@ -264,9 +450,3 @@ class ViolationDetector:
     def _get_embedding(self, text: str) -> list:
         resp = self.client.embeddings.create(model="text-embedding-3-small", input=text)
         return resp.data[0].embedding
-
-    def _cosine_sim(self, v1: list, v2: list) -> float:
-        dot = sum(a * b for a, b in zip(v1, v2))
-        n1 = math.sqrt(sum(a * a for a in v1))
-        n2 = math.sqrt(sum(b * b for b in v2))
-        return dot / (n1 * n2) if n1 and n2 else 0.0
@@ -1,60 +1,100 @@
 import logging
+import time
+
+import orjson
 import requests
+from types import MappingProxyType
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from typing import Optional, Any
 
 logger = logging.getLogger(__name__)
 
+_NOTION_API_BASE = "https://api.notion.com/v1"
+
+# モジュールレベルのSession（同一コンテナで再利用）
+# 素のrequests.post/patchは毎回TCP+TLSハンドシェイク（~100-300ms）を払う。
+# keep-aliveなコネクションプールをwarm invocation間で使い回す
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+
+
+# 重複チェック結果のTTLキャッシュ（同一コンテナで再利用）
+# Notion DBクエリは1回200-500msかかり3RPS制限にも数えられるため、
+# 同じmessage_tsの再チェックはローカルのdict参照で済ませる
+_DUP_CACHE: dict[str, tuple[float, bool]] = {}
+_DUP_CACHE_TTL_SEC = 3600.0
+_DUP_CACHE_MAXSIZE = 4096
+
 
 class NotionClient:
     def __init__(self, api_key: str, db_id: str):
         self.api_key = api_key
         self.db_id = db_id
-        self.headers = {
+        # 変更不可のヘッダとして固定（全リクエストで同じオブジェクトを使い回す）
+        self.headers = MappingProxyType({
             "Authorization": f"Bearer {api_key}",
             "Notion-Version": "2022-06-28",
             "Content-Type": "application/json"
-        }
+        })
 
-    def _query(self, filter_obj: dict = None) -> list:
-        """Notion DBクエリ（ページネーション対応）"""
-        url = f"https://api.notion.com/v1/databases/{self.db_id}/query"
-        results = []
+    def _iter_query(self, filter_obj: dict = None):
+        """Notion DBクエリ（ページネーション対応）
+
+        全ページをリストに溜めず1件ずつyieldするジェネレータ。
+        呼び出し側が途中でbreakすれば残りのページは取得しない。
+        """
+        url = f"{_NOTION_API_BASE}/databases/{self.db_id}/query"
         cursor = None
 
         while True:
-            body = {}
+            body: dict[str, Any] = {"page_size": 100}
             if filter_obj:
                 body["filter"] = filter_obj
             if cursor:
                 body["start_cursor"] = cursor
 
-            resp = requests.post(url, headers=self.headers, json=body, timeout=10)
+            resp = _SESSION.post(url, headers=self.headers, data=orjson.dumps(body), timeout=10)
             if not resp.ok:
                 raise Exception(f"Notion query error: {resp.status_code} {resp.text}")
 
-            data = resp.json()
-            results.extend(data.get("results", []))
+            data = orjson.loads(resp.content)
+            yield from data.get("results", [])
             if not data.get("has_more"):
                 break
             cursor = data.get("next_cursor")
 
-        return results
-
     def check_duplicate_violation(self, message_ts: str) -> bool:
         """同じ投稿(message_ts)が既に記録されているかチェック"""
         if not self.db_id:
             return False
+
+        entry = _DUP_CACHE.get(message_ts)
+        if entry is not None:
+            expires_at, is_dup = entry
+            if expires_at > time.time():
+                return is_dup
+            del _DUP_CACHE[message_ts]
+
         try:
-            results = self._query({
+            # 1件見つかった時点で打ち切る（後続ページは取得しない）
+            first = next(self._iter_query({
                 "property": "投稿内容",
                 "title": {"starts_with": f"{message_ts}:"}
-            })
-            return len(results) > 0
+            }), None)
+            is_dup = first is not None
+            self._cache_duplicate(message_ts, is_dup)
+            return is_dup
         except Exception as e:
             logger.error(f"Duplicate check failed: {e}")
             return False
 
+    @staticmethod
+    def _cache_duplicate(message_ts: str, is_dup: bool) -> None:
+        if len(_DUP_CACHE) >= _DUP_CACHE_MAXSIZE:
+            _DUP_CACHE.clear()
+        _DUP_CACHE[message_ts] = (time.time() + _DUP_CACHE_TTL_SEC, is_dup)
+
     def create_violation_log(
         self,
         post_content: str,
@@ -113,20 +153,24 @@ class NotionClient:
         if confidence is not None:
             props["信頼度"] = {"number": confidence}
 
-        url = "https://api.notion.com/v1/pages"
+        url = f"{_NOTION_API_BASE}/pages"
         payload = {
             "parent": {"database_id": self.db_id},
             "properties": props
         }
 
         try:
-            resp = requests.post(url, headers=self.headers, json=payload, timeout=5)
+            resp = _SESSION.post(url, headers=self.headers, data=orjson.dumps(payload), timeout=5)
 
             if not resp.ok:
                 logger.error(f"Create failed: {resp.status_code} {resp.text}")
                 return None
 
-            return resp.json().get("id")
+            # 作成に成功した投稿は重複キャッシュへ即反映（次の到着をクエリなしで弾く）
+            if message_ts:
+                self._cache_duplicate(message_ts, True)
+
+            return orjson.loads(resp.content).get("id")
         except Exception as e:
             logger.error(f"Create failed: {e}")
             return None
@@ -139,7 +183,7 @@ class NotionClient:
         responder_id: str = None,
     ) -> bool:
         """ページのステータスを更新する。対応者・警告送信日時も任意で記録。"""
-        url = f"https://api.notion.com/v1/pages/{page_id}"
+        url = f"{_NOTION_API_BASE}/pages/{page_id}"
 
         props: dict[str, Any] = {
             "対応ステータス": {"select": {"name": status}}
@@ -150,8 +194,8 @@ class NotionClient:
             props["対応者"] = {"rich_text": [{"text": {"content": responder_id}}]}
 
         try:
-            resp = requests.patch(
-                url, headers=self.headers, json={"properties": props}, timeout=5
+            resp = _SESSION.patch(
+                url, headers=self.headers, data=orjson.dumps({"properties": props}), timeout=5
             )
             resp.raise_for_status()
             return True
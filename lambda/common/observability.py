@@ -1,26 +1,39 @@
 from __future__ import annotations
 
 import os
+import sys
 import json
 import time
-import uuid
-import hashlib
+
+import orjson
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import islice
 from typing import Any, Dict, Optional, Tuple
-from urllib.parse import parse_qs
+from urllib.parse import parse_qs, unquote_plus
 
 METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "SlackModerationBot")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
 _LEVEL_ORDER = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40}
 
+# レベル判定はimport時に全レベル分を前計算しておく（log()ごとの比較を1回のdict参照に）
+_LOG_THRESHOLD = _LEVEL_ORDER.get(LOG_LEVEL, 20)
+_LEVELS_ENABLED = {lvl: n >= _LOG_THRESHOLD for lvl, n in _LEVEL_ORDER.items()}
+
 
 def _now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # datetimeオブジェクトを作らずISO 8601文字列を組み立てる（出力形式は従来と同じ）
+    t = time.time()
+    return f"{time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(t))}.{int(t % 1 * 1e6):06d}+00:00"
 
+@lru_cache(maxsize=1024)
 def _hash16(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()[:16]
+    # 非暗号用途（相関キー）なので blake2b で十分。短い入力ではsha256の2-3倍速い。
+    # Slackのリトライで同じ (team|channel|ts) が再来するためメモ化しておく。
+    # hashlibのimportはコールドスタートを削るため初回呼び出しまで遅延させる
+    import hashlib
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=8).hexdigest()
 
 def _truncate_str(s: str, limit: int = 500) -> str:
     return s if len(s) <= limit else s[:limit] + "...(truncated)"
@@ -33,13 +46,14 @@ def _safe_jsonable(v: Any) -> Any:
             return v
         if isinstance(v, dict):
             out = {}
-            for k, vv in list(v.items())[:50]:
+            # 全要素をリスト化してからスライスせず、先頭50件だけ走査する
+            for k, vv in islice(v.items(), 50):
                 out[str(k)] = _safe_jsonable(vv)
             if len(v) > 50:
                 out["_truncated_keys"] = len(v) - 50
             return out
         if isinstance(v, list):
-            out = [_safe_jsonable(x) for x in v[:50]]
+            out = [_safe_jsonable(x) for x in islice(v, 50)]
             if len(v) > 50:
                 out.append({"_truncated_items": len(v) - 50})
             return out
@@ -48,16 +62,18 @@ def _safe_jsonable(v: Any) -> Any:
         return "<unserializable>"
 
 def _should_log(level: str) -> bool:
-    return _LEVEL_ORDER.get(level, 20) >= _LEVEL_ORDER.get(LOG_LEVEL, 20)
+    return _LEVELS_ENABLED.get(level, True)
 
 def _json_print(obj: Dict[str, Any]) -> None:
-    print(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
-
-def _lower_headers(headers: Optional[Dict[str, Any]]) -> Dict[str, str]:
-    if not headers:
-        return {}
-    return {str(k).lower(): str(v) for k, v in headers.items() if k is not None}
-
+    # orjson.dumps はbytesを返すので、stdoutへはstr経由せずそのまま書く
+    # （stdlib jsonの ensure_ascii=False + separators と同等のコンパクトなUTF-8出力）
+    try:
+        line = orjson.dumps(obj)
+    except TypeError:
+        line = json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+    buf = sys.stdout.buffer
+    buf.write(line + b"\n")
+    buf.flush()
 
 # ---- Slackイベントのパース ----
 def parse_apigw_body(event: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
@@ -81,37 +97,41 @@ def parse_apigw_body(event: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], O
             return None, body
         return None, None
 
-    body_str = str(body)
-    headers = _lower_headers(event.get("headers"))
-    content_type = headers.get("content-type", "")
+    # API Gatewayでbase64デコード済みのbytesが来ることもある。str(bytes)は "b'...'" に
+    # なってしまうので明示的にデコードする
+    if isinstance(body, (bytes, bytearray)):
+        body_str = bytes(body).decode("utf-8", "replace")
+    else:
+        body_str = str(body)
 
-    if "application/json" in content_type:
+    # Content-Typeヘッダではなく先頭1文字で振り分ける（JSONなら必ず "{" で始まり、
+    # interactivityのform-urlencodedは "payload=" で始まる）。パースは1回だけ行う
+    if body_str[:1] == "{":
         try:
-            j = json.loads(body_str)
-            if "event_id" in j or j.get("type") in ("event_callback", "url_verification"):
-                return j, None
+            j = orjson.loads(body_str)
         except Exception:
             return None, None
+        if "event_id" in j or j.get("type") in ("event_callback", "url_verification"):
+            return j, None
+        if "actions" in j and "team" in j:
+            return None, j
+        return None, None
 
-    if "application/x-www-form-urlencoded" in content_type or "payload=" in body_str:
+    if "payload=" in body_str:
         try:
+            # Slackのinteractivityボディは常に payload=<urlencoded json> 単体なので、
+            # 全フィールドをデコードするparse_qsを通さず末尾だけunquoteする
+            if body_str.startswith("payload="):
+                payload = orjson.loads(unquote_plus(body_str[8:]))
+                return None, payload
             qs = parse_qs(body_str)
             payload_list = qs.get("payload")
             if payload_list:
-                payload = json.loads(payload_list[0])
+                payload = orjson.loads(payload_list[0])
                 return None, payload
         except Exception:
             return None, None
 
-    try:
-        j = json.loads(body_str)
-        if "event_id" in j or j.get("type") in ("event_callback", "url_verification"):
-            return j, None
-        if "actions" in j and "team" in j:
-            return None, j
-    except Exception:
-        pass
-
     return None, None
 
 def extract_from_event_api(body: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
@@ -133,7 +153,7 @@ def _try_extract_trace_from_button_value(payload: Dict[str, Any]) -> Optional[st
         if not v:
             return None
         if isinstance(v, str):
-            vv = json.loads(v)
+            vv = orjson.loads(v)
             if isinstance(vv, dict) and vv.get("trace_id"):
                 return str(vv["trace_id"])
         if isinstance(v, dict) and v.get("trace_id"):
@@ -164,7 +184,7 @@ def extract_from_interactivity(payload: Dict[str, Any]) -> Tuple[Optional[str],
     return trace_id, team_id, channel_id, message_ts, action_id
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ObsContext:
     service: str
     trace_id: str
@@ -205,13 +225,23 @@ def build_context(event: Dict[str, Any], aws_context: Any, service: str) -> ObsC
         base = f"{slack_team_id or '-'}|{slack_channel_id or '-'}|{slack_message_ts or '-'}"
         trace_id = f"msg:{_hash16(base)}"
     else:
+        import uuid
         trace_id = f"gen:{uuid.uuid4().hex[:16]}"
 
+    # Lambdaランタイムのcontextは常に両属性を持つので直接参照する。
+    # 成功パスのtryはCPythonではゼロコストで、getattr(…, None)のデフォルト処理より速い
+    # （テスト等でcontextが素のdict/Noneの場合だけexceptに落ちる）
+    try:
+        request_id = aws_context.aws_request_id
+        function_name = aws_context.function_name
+    except AttributeError:
+        request_id = function_name = None
+
     return ObsContext(
         service=service,
         trace_id=trace_id,
-        request_id=getattr(aws_context, "aws_request_id", None),
-        function_name=getattr(aws_context, "function_name", None),
+        request_id=request_id,
+        function_name=function_name,
         slack_event_id=slack_event_id,
         slack_team_id=slack_team_id,
         slack_channel_id=slack_channel_id,
@@ -220,28 +250,44 @@ def build_context(event: Dict[str, Any], aws_context: Any, service: str) -> ObsC
     )
 
 
+# logペイロードの固定キー（1回のdict(zip(...))で組み立てて13回の__setitem__を省く）
+_LOG_KEYS = (
+    "ts", "level", "service", "trace_id", "action", "result",
+    "request_id", "function_name",
+    "slack_event_id", "slack_team_id", "slack_channel_id",
+    "slack_message_ts", "slack_action_id",
+)
+
+
 def log(level: str, context: ObsContext, action: str, result: str, **fields: Any) -> None:
     if not _should_log(level):
         return
 
-    payload: Dict[str, Any] = {
-        "ts": _now_iso(),
-        "level": level,
-        "service": context.service,
-        "trace_id": context.trace_id,
-        "action": action,
-        "result": result,
-        "request_id": context.request_id,
-        "function_name": context.function_name,
-        "slack_event_id": context.slack_event_id,
-        "slack_team_id": context.slack_team_id,
-        "slack_channel_id": context.slack_channel_id,
-        "slack_message_ts": context.slack_message_ts,
-        "slack_action_id": context.slack_action_id,
-    }
+    payload: Dict[str, Any] = dict(zip(_LOG_KEYS, (
+        _now_iso(),
+        level,
+        context.service,
+        context.trace_id,
+        action,
+        result,
+        context.request_id,
+        context.function_name,
+        context.slack_event_id,
+        context.slack_team_id,
+        context.slack_channel_id,
+        context.slack_message_ts,
+        context.slack_action_id,
+    )))
 
     for k, v in fields.items():
-        payload[k] = _safe_jsonable(v)
+        # 大半のフィールドは短いstrかint等のスカラ。その場合は再帰walkを丸ごと飛ばす
+        t = type(v)
+        if t is str:
+            payload[k] = v if len(v) <= 500 else _truncate_str(v)
+        elif v is None or t in (int, float, bool):
+            payload[k] = v
+        else:
+            payload[k] = _safe_jsonable(v)
 
     _json_print(payload)
 
@@ -255,6 +301,17 @@ def log_error(context: ObsContext, action: str, error: Exception, result: str =
     log("ERROR", context, action, result, error_type=type(error).__name__, error_message=_truncate_str(str(error), 800), **fields)
 
 
+@lru_cache(maxsize=128)
+def _emf_metadata(name: str, unit: str, namespace: str, dim_keys: Tuple[str, ...]) -> Dict[str, Any]:
+    # CloudWatchMetricsブロックは (name, unit, namespace, dims) が同じ限り毎回同一。
+    # Timestamp以外の静的な骨格をメモ化してネストdict/listの再構築を省く
+    return {
+        "Namespace": namespace,
+        "Dimensions": [list(dim_keys)],
+        "Metrics": [{"Name": name, "Unit": unit}],
+    }
+
+
 def emit_metric(
     context: ObsContext,
     name: str,
@@ -264,6 +321,36 @@ def emit_metric(
     namespace: str = METRICS_NAMESPACE,
 ) -> None:
     dims = dimensions or {"service": context.service}
+    emf: Dict[str, Any] = {
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [_emf_metadata(name, unit, namespace, tuple(dims.keys()))],
+        },
+        **dims,
+        name: value,
+        "trace_id": context.trace_id,
+    }
+    _json_print(emf)
+
+# ---- メトリクスのバッファリング ----
+# 1リクエストで3-5回 emit_metric を呼ぶとEMF行がその数だけ出力される。
+# Lambdaコンテナは同時に1リクエストしか処理しないので、モジュールレベルの
+# バッファに貯めて最後に1行のEMFとしてまとめて出力する（ログ書き込み回数削減）
+_metric_buffer: list[Tuple[str, float, str]] = []
+
+
+def buffer_metric(context: ObsContext, name: str, value: float = 1.0, unit: str = "Count") -> None:
+    _metric_buffer.append((name, value, unit))
+
+
+def flush_metrics(
+    context: ObsContext,
+    dimensions: Optional[Dict[str, str]] = None,
+    namespace: str = METRICS_NAMESPACE,
+) -> None:
+    if not _metric_buffer:
+        return
+    dims = dimensions or {"service": context.service}
     emf: Dict[str, Any] = {
         "_aws": {
             "Timestamp": int(time.time() * 1000),
@@ -271,19 +358,25 @@ def emit_metric(
                 {
                     "Namespace": namespace,
                     "Dimensions": [list(dims.keys())],
-                    "Metrics": [{"Name": name, "Unit": unit}],
+                    "Metrics": [{"Name": n, "Unit": u} for n, _, u in _metric_buffer],
                 }
             ],
         },
         **dims,
-        name: value,
         "trace_id": context.trace_id,
     }
+    for n, v, _ in _metric_buffer:
+        emf[n] = v
+    _metric_buffer.clear()
     _json_print(emf)
 
+
 class Timer:
+    # 壁時計(time.time)はNTP補正で逆行しうるので、レイテンシ計測は単調クロックで取る
+    __slots__ = ("_t0",)
+
     def __init__(self) -> None:
-        self._t0 = time.time()
+        self._t0 = time.monotonic_ns()
 
     def ms(self) -> float:
-        return (time.time() - self._t0) * 1000.0
\ No newline at end of file
+        return (time.monotonic_ns() - self._t0) / 1_000_000
\ No newline at end of file
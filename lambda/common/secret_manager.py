@@ -1,7 +1,52 @@
-import boto3
 import os
+import threading
 
 _secrets_cache = {}
+# 空文字のシークレットもキャッシュできるよう、ミス判定は番兵オブジェクトで行う
+_MISSING = object()
+
+# SSMクライアントのシングルトン（同一コンテナで再利用）
+# boto3.client() は毎回 ~200ms かかるため、キャッシュミスのたびに作り直さない。
+# コールドスタート直後に複数スレッドが同時に来ても1つしか作らないようロックで保護
+_ssm_client = None
+_ssm_client_lock = threading.Lock()
+
+
+def _get_ssm_client():
+    global _ssm_client
+    if _ssm_client is None:
+        with _ssm_client_lock:
+            if _ssm_client is None:
+                # boto3のimportは数百msかかるため、実際にSSMへ行くときまで遅延させる
+                import boto3
+                _ssm_client = boto3.client("ssm")
+    return _ssm_client
+
+
+def prefetch_secrets(secret_name_env_keys: list[str]) -> None:
+    """
+    複数パラメータを get_parameters で一括取得してキャッシュに積む。
+    1件ずつの get_parameter（各30-80ms）をn回払う代わりに1往復で済ませる。
+    取得できなかった分は後続の get_secret が個別にフォールバックする。
+    """
+    names = []
+    for env_key in secret_name_env_keys:
+        param_name = os.getenv(env_key)
+        if param_name and param_name not in _secrets_cache:
+            names.append(param_name)
+    if not names:
+        return
+
+    client = _get_ssm_client()
+    try:
+        # get_parameters は最大10件まで受け付ける
+        for i in range(0, len(names), 10):
+            resp = client.get_parameters(Names=names[i:i + 10], WithDecryption=True)
+            for param in resp.get("Parameters", []):
+                _secrets_cache[param["Name"]] = param["Value"]
+    except Exception as e:
+        print(f"Failed to prefetch parameters: {e}")
+
 
 def get_secret(secret_name_env_key: str) -> str:
     """
@@ -12,21 +57,23 @@ def get_secret(secret_name_env_key: str) -> str:
     if not param_name:
         return ""
     
-    # キャッシュ確認
-    if param_name in _secrets_cache:
-        return _secrets_cache[param_name]
+    # キャッシュ確認（1回のdict参照。空文字もヒット扱いにする）
+    cached = _secrets_cache.get(param_name, _MISSING)
+    if cached is not _MISSING:
+        return cached
 
-    # ★変更点: SSMクライアントを使用
-    client = boto3.client("ssm")
+    # ★変更点: SSMクライアントを使用（コンテナで1つだけ生成して使い回す）
+    client = _get_ssm_client()
     try:
         # ★変更点: get_parameter を使用 (WithDecryption=True で復号)
         resp = client.get_parameter(Name=param_name, WithDecryption=True)
-        if "Parameter" in resp and "Value" in resp["Parameter"]:
-            secret_value = resp["Parameter"]["Value"]
-            _secrets_cache[param_name] = secret_value
-            return secret_value
     except Exception as e:
         print(f"Failed to fetch parameter {param_name}: {e}")
         return ""
-    
+
+    if "Parameter" in resp and "Value" in resp["Parameter"]:
+        secret_value = resp["Parameter"]["Value"]
+        _secrets_cache[param_name] = secret_value
+        return secret_value
+
     return ""
\ No newline at end of file
@@ -0,0 +1,35 @@
+import logging
+import os
+import random
+import time
+
+from slack_sdk.errors import SlackApiError
+
+logger = logging.getLogger(__name__)
+
+_MAX_RETRIES = int(os.getenv("SLACK_RATE_LIMIT_RETRIES", "3"))
+
+
+def slack_call_with_retry(fn, **kwargs):
+    """Slack API呼び出しを429/5xx時だけ再試行するラッパー
+
+    429はSlackのRetry-Afterヘッダに従って待ち、502/503は指数バックオフ+
+    ジッタで再試行する。それ以外のエラー（4xx等）は即座に送出する。
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(**kwargs)
+        except SlackApiError as e:
+            attempt += 1
+            status = getattr(e.response, "status_code", None)
+            if attempt > _MAX_RETRIES or status not in (429, 502, 503):
+                raise
+            if status == 429:
+                delay = float(e.response.headers.get("Retry-After", "1"))
+            else:
+                delay = (2 ** (attempt - 1)) + random.uniform(0, 0.25)
+            logger.warning(
+                f"Slack API retry {attempt}/{_MAX_RETRIES} in {delay}s (status={status})"
+            )
+            time.sleep(delay)
@@ -1,10 +1,16 @@
 # root/tests/conftest.py
 import sys
 import os
+import copy
 import json
+import contextlib
+import functools
 import urllib.parse
 from pathlib import Path
+from types import MappingProxyType
+import orjson
 import pytest
+from unittest import mock
 from unittest.mock import MagicMock
 
 # -----------------------------
@@ -23,6 +29,14 @@ def _read_json(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+@functools.lru_cache(maxsize=None)
+def _load_fixture_cached(name: str) -> dict:
+    p = FIXTURES_DIR / name
+    if not p.exists():
+        raise FileNotFoundError(f"fixture not found: {p}")
+    return _read_json(p)
+
+
 # -----------------------------
 # Contract / fixtures loader
 # -----------------------------
@@ -31,12 +45,12 @@ def load_contract_fixture():
     """
     contracts/fixtures/*.json を読み込むローダー
     例: load_contract_fixture("event_api_message.json")
+
+    パース結果はセッションでキャッシュし、テストがheaders等を書き換えても
+    他のテストに波及しないようdeepcopyして返す
     """
     def _load(name: str) -> dict:
-        p = FIXTURES_DIR / name
-        if not p.exists():
-            raise FileNotFoundError(f"fixture not found: {p}")
-        return _read_json(p)
+        return copy.deepcopy(_load_fixture_cached(name))
     return _load
 
 
@@ -51,20 +65,64 @@ def alert_button_value_schema():
     return _read_json(schema_path)
 
 
+@pytest.fixture(scope="session")
+def alert_button_value_validator(alert_button_value_schema):
+    """
+    コンパイル済みのスキーマバリデータ（セッションで1回だけ構築する）。
+    jsonschema.validate はテストごとにバリデータツリーを作り直すため、こちらを使う
+    """
+    jsonschema = pytest.importorskip("jsonschema")
+    return jsonschema.Draft202012Validator(alert_button_value_schema)
+
+
 # -----------------------------
 # Env / config mocks
 # -----------------------------
+@pytest.fixture(scope="session", autouse=True)
+def mock_env():
+    """テスト実行時に必要な環境変数をセット（値は固定なのでセッションで1回だけ）"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("SLACK_SIGNING_SECRET", "secret")
+        mp.setenv("SLACK_BOT_TOKEN", "xoxb-test")
+        mp.setenv("OPENAI_API_KEY", "sk-test")
+        mp.setenv("NOTION_API_KEY", "secret_notion")
+        mp.setenv("NOTION_DB_ID", "db_id")
+        mp.setenv("ALERT_PRIVATE_CHANNEL_ID", "C_ADMIN")
+        mp.setenv("OPENAI_MODEL", "gpt-4")
+        mp.setenv("GUIDELINES_TEXT", "Spam is prohibited.")
+        yield
+
+
 @pytest.fixture(autouse=True)
-def mock_env(monkeypatch):
-    """テスト実行時に必要な環境変数をセット"""
-    monkeypatch.setenv("SLACK_SIGNING_SECRET", "secret")
-    monkeypatch.setenv("SLACK_BOT_TOKEN", "xoxb-test")
-    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
-    monkeypatch.setenv("NOTION_API_KEY", "secret_notion")
-    monkeypatch.setenv("NOTION_DB_ID", "db_id")
-    monkeypatch.setenv("ALERT_PRIVATE_CHANNEL_ID", "C_ADMIN")
-    monkeypatch.setenv("OPENAI_MODEL", "gpt-4")
-    monkeypatch.setenv("GUIDELINES_TEXT", "Spam is prohibited.")
+def clear_handler_caches():
+    """モジュールレベルのコンテナキャッシュをテスト間で持ち越さない"""
+    from app_inspect import handler as inspect_handler
+    from app_inspect.services import config as inspect_config
+    from app_inspect.services import moderation
+    from app_inspect.services import violation_detector
+    from app_alert import handler as alert_handler
+    from app_alert.services import actions
+    from app_alert.services import config as alert_config
+    from common import notion_client
+
+    inspect_handler._MOD_CACHE.clear()
+    inspect_handler._verifier_cache.clear()
+    inspect_handler._slack_client_cache.clear()
+    inspect_handler._user_name_cache.clear()
+    inspect_handler._channel_name_cache.clear()
+    inspect_handler._team_name_cache.clear()
+    alert_handler._verifier_cache.clear()
+    alert_handler._slack_client_cache.clear()
+
+    # シングルトン類は作り直させる（detectorは内部にdetect/prompt prefixキャッシュを持つ）
+    moderation._DETECTOR = None
+    inspect_config._CONFIG = None
+    alert_config._CONFIG = None
+    actions._ARTICLES_INDEX_CACHE = None
+
+    violation_detector._LLM_JUDGE_CACHE.clear()
+    notion_client._DUP_CACHE.clear()
+    yield
 
 
 @pytest.fixture
@@ -88,51 +146,69 @@ def mock_config(mocker):
     return mock_conf
 
 
+@pytest.fixture(scope="session")
+def _patched_externals():
+    """外部サービスのパッチをセッションで1回だけ張る（テスト間はresetで初期化）"""
+    mock_verifier = MagicMock()
+    mock_slack_client = MagicMock()
+    mock_openai_client = MagicMock()
+    mock_notion_client = MagicMock()
+
+    with contextlib.ExitStack() as stack:
+        for target, instance in (
+            ("app_inspect.handler.SignatureVerifier", mock_verifier),
+            ("app_alert.handler.SignatureVerifier", mock_verifier),
+            ("app_inspect.handler.WebClient", mock_slack_client),
+            ("app_alert.handler.WebClient", mock_slack_client),
+            ("app_inspect.handler.OpenAI", mock_openai_client),
+            ("app_inspect.handler.NotionClient", mock_notion_client),
+            ("app_alert.handler.NotionClient", mock_notion_client),
+        ):
+            stack.enter_context(mock.patch(target, return_value=instance))
+
+        yield {
+            "slack": mock_slack_client,
+            "signature": mock_verifier,
+            "openai": mock_openai_client,
+            "notion": mock_notion_client,
+        }
+
+
 @pytest.fixture
-def mock_external_services(mocker):
-    """外部サービスのクライアントをまとめてモック化"""
+def mock_external_services(_patched_externals):
+    """外部サービスのクライアントをまとめてモック化（テストごとに状態をリセット）"""
+    for m in _patched_externals.values():
+        m.reset_mock(return_value=True, side_effect=True)
 
     # 署名検証：デフォルト False（テスト側で True を明示）
-    mock_verifier = mocker.MagicMock()
-    mock_verifier.is_valid_request.return_value = False
-
-    mock_slack_client = mocker.MagicMock()
-    mock_openai_client = mocker.MagicMock()
-    mock_notion_client = mocker.MagicMock()
-    mock_notion_client.check_duplicate_violation.return_value = False
+    _patched_externals["signature"].is_valid_request.return_value = False
+    _patched_externals["notion"].check_duplicate_violation.return_value = False
 
-    mocker.patch("app_inspect.handler.SignatureVerifier", return_value=mock_verifier)
-    mocker.patch("app_alert.handler.SignatureVerifier", return_value=mock_verifier)
+    return _patched_externals
 
-    mocker.patch("app_inspect.handler.WebClient", return_value=mock_slack_client)
-    mocker.patch("app_alert.handler.WebClient", return_value=mock_slack_client)
 
-    mocker.patch("app_inspect.handler.OpenAI", return_value=mock_openai_client)
+# -----------------------------
+# Slack イベントヘルパー
+# -----------------------------
+# ヘッダとフラグは全イベント共通なので、凍結したテンプレートをモジュールで1回だけ作る
+_FORM_EVENT_TEMPLATE = MappingProxyType({
+    "headers": MappingProxyType({"content-type": "application/x-www-form-urlencoded"}),
+    "isBase64Encoded": False,
+})
 
-    mocker.patch("app_inspect.handler.NotionClient", return_value=mock_notion_client)
-    mocker.patch("app_alert.handler.NotionClient", return_value=mock_notion_client)
 
-    return {
-        "slack": mock_slack_client,
-        "signature": mock_verifier,
-        "openai": mock_openai_client,
-        "notion": mock_notion_client,
-    }
+@functools.lru_cache(maxsize=None)
+def _quote_payload(payload_json: str) -> str:
+    return urllib.parse.quote(payload_json)
 
 
-# -----------------------------
-# Slack イベントヘルパー
-# -----------------------------
-@pytest.fixture
+@pytest.fixture(scope="session")
 def to_apigw_form_event():
     """
     Slackインタラクティビティペイロードを API Gateway形式のイベントに変換するファクトリー
     """
     def _convert(payload: dict) -> dict:
-        body_str = "payload=" + urllib.parse.quote(json.dumps(payload))
-        return {
-            "body": body_str,
-            "headers": {"content-type": "application/x-www-form-urlencoded"},
-            "isBase64Encoded": False,
-        }
+        # 同じペイロードを使い回すテストが多いのでquote結果をメモ化する
+        body_str = "payload=" + _quote_payload(orjson.dumps(payload).decode())
+        return {**_FORM_EVENT_TEMPLATE, "body": body_str}
     return _convert
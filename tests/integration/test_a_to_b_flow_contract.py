@@ -1,8 +1,9 @@
 import json
 import pytest
-from unittest.mock import MagicMock
 
+from app_inspect import handler as inspect_handler
 from app_inspect.handler import lambda_handler as lambdaA
+from app_inspect.services.models import ModerationResult
 from app_alert.handler import lambda_handler as lambdaB
 
 jsonschema = pytest.importorskip("jsonschema")
@@ -18,7 +19,7 @@ def _find_button_by_action_id(blocks: list, action_id: str) -> dict:
 
 
 def test_A_to_B_flow_dismiss_updates_notion(
-    load_contract_fixture, alert_button_value_schema, mock_external_services, mock_config, mocker, to_apigw_form_event
+    load_contract_fixture, alert_button_value_validator, mock_external_services, mock_config, monkeypatch, to_apigw_form_event
 ):
     # 共通：署名はユニットなのでOK扱い
     mock_external_services["signature"].is_valid_request.return_value = True
@@ -27,13 +28,16 @@ def test_A_to_B_flow_dismiss_updates_notion(
     mock_notion = mock_external_services["notion"]
 
     # --- A側の前提（違反ありで通知を出す）
-    mock_result = MagicMock()
-    mock_result.is_violation = True
-    mock_result.severity = "high"
-    mock_result.rationale = "spam"
-    mock_result.confidence = 0.9
-    mock_result.article_id = "A-123"
-    mocker.patch("app_inspect.handler.run_moderation", return_value=mock_result)
+    mock_result = ModerationResult(
+        is_violation=True,
+        severity="high",
+        categories=["spam"],
+        rationale="spam",
+        recommended_reply="削除を推奨します",
+        confidence=0.9,
+        article_id="A-123",
+    )
+    monkeypatch.setattr(inspect_handler, "run_moderation", lambda *a, **k: mock_result)
 
     mock_slack.chat_getPermalink.return_value = {"permalink": "http://slack.com/p1"}
     mock_notion.create_violation_log.return_value = "page-id-123"
@@ -55,7 +59,7 @@ def test_A_to_B_flow_dismiss_updates_notion(
     value_from_A = json.loads(dismiss_btn["value"])
 
     # スキーマにも適合していること（契約担保）
-    jsonschema.validate(instance=value_from_A, schema=alert_button_value_schema)
+    alert_button_value_validator.validate(value_from_A)
 
     # --- B側へ接続：Aが生成した value をそのまま actions[0].value に入れる
     mock_slack.reset_mock()
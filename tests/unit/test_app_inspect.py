@@ -1,7 +1,8 @@
 import json
-from unittest.mock import MagicMock
 import pytest
+from app_inspect import handler as inspect_handler
 from app_inspect.handler import lambda_handler
+from app_inspect.services.models import ModerationResult
 
 jsonschema = pytest.importorskip("jsonschema")
 
@@ -19,20 +20,24 @@ def _find_first_button(blocks: list) -> dict:
 
 
 def test_lambdaA_emits_contract_compliant_button_value(
-    load_contract_fixture, alert_button_value_schema, mock_external_services, mock_config, mocker
+    load_contract_fixture, alert_button_value_validator, mock_external_services, mock_config, monkeypatch
 ):
     # 署名OK（このテストでは署名そのものは目的ではない）
     mock_external_services["signature"].is_valid_request.return_value = True
 
     # moderation: 違反あり
-    mock_result = MagicMock()
-    mock_result.is_violation = True
-    mock_result.severity = "high"
-    mock_result.rationale = "spam"
-
-    mock_result.confidence = 0.9
-    mock_result.article_id = "A-123"
-    mocker.patch("app_inspect.handler.run_moderation", return_value=mock_result)
+    # MagicMockより生成が1桁速く、属性アクセスも本物と同じ挙動になる
+    mock_result = ModerationResult(
+        is_violation=True,
+        severity="high",
+        categories=["spam"],
+        rationale="spam",
+        recommended_reply="削除を推奨します",
+        confidence=0.9,
+        article_id="A-123",
+    )
+    # import済みモジュールへのsetattrはドット文字列解決付きのmocker.patchより軽い
+    monkeypatch.setattr(inspect_handler, "run_moderation", lambda *a, **k: mock_result)
 
     # Slack/Notionの戻り値
     mock_slack = mock_external_services["slack"]
@@ -67,7 +72,7 @@ def test_lambdaA_emits_contract_compliant_button_value(
     assert btn["action_id"] == "approve_violation"
 
     value = json.loads(btn["value"])
-    jsonschema.validate(instance=value, schema=alert_button_value_schema)
+    alert_button_value_validator.validate(value)
 
     # 入力イベントと整合することを検証（ここでA-B間の壊れを止める）
     body = json.loads(event["body"])